@@ -5,6 +5,7 @@
 
 #include <cstdarg>
 #include <cstddef>
+#include <cstdint>
 #include <cstring>
 #include <iterator>
 #include <string>
@@ -86,9 +87,14 @@ PYBIND11_MODULE(delaunay_class, m) {
       .def(py::init())
 
       .def("insert",
-           [](DT &dt, const std::vector<double> &p) {
+           [](DT &dt,
+              py::array_t<double, py::array::c_style | py::array::forcecast>
+                  pts) {
+             // read the coordinates straight out of the NumPy buffer
+             const double *p = pts.data();
              std::vector<std::pair<Point, unsigned>> points;
-             int num_points = p.size() / 2;
+             int num_points = pts.size() / 2;
+             points.reserve(num_points);
              // start adding at the end of the current table
              int start = dt.number_of_vertices();
              for (std::size_t i = 0; i < num_points; ++i) {
@@ -115,11 +121,18 @@ PYBIND11_MODULE(delaunay_class, m) {
            })
 
       .def("move",
-           [](DT &dt, const std::vector<unsigned int> &to_move,
-              const std::vector<double> &new_positions) {
+           [](DT &dt,
+              py::array_t<int64_t, py::array::c_style | py::array::forcecast>
+                  ix,
+              py::array_t<double, py::array::c_style | py::array::forcecast>
+                  pts) {
+             const int64_t *to_move = ix.data();
+             const double *new_positions = pts.data();
              std::vector<Vertex_handle> handles;
              std::vector<Point> new_pos;
-             int num_to_move = to_move.size();
+             int num_to_move = ix.size();
+             handles.reserve(dt.number_of_vertices());
+             new_pos.reserve(num_to_move);
              // store all vertex handles
              for (Vi vi = dt.finite_vertices_begin();
                   vi != dt.finite_vertices_end(); vi++) {
@@ -134,7 +147,6 @@ PYBIND11_MODULE(delaunay_class, m) {
              for (std::size_t i = 0; i < num_to_move; ++i) {
                dt.move(handles[to_move[i]], new_pos[i]);
              }
-             return dt;
            })
 
       .def("number_of_vertices", &DT::number_of_vertices)
@@ -19,9 +19,11 @@ import warnings
 
 import numpy as np
 from mpi4py import MPI
+from scipy.spatial import cKDTree
 
 from .. import decomp, geometry, migration
 from .. import sizing
+from ..geometry.cpp import fast_geometry as gutils
 from . import utils as mutils
 from .cpp.delaunay_class import DelaunayTriangulation as DT2
 from .cpp.delaunay_class3 import DelaunayTriangulation3 as DT3
@@ -203,10 +205,10 @@ def sliver_removal(points, domain, edge_length, comm=None, **kwargs):  # noqa: C
         # Using CGAL's incremental Delaunay triangulation capabilities.
         if count == 0:
             dt = DT()
-            dt.insert(p.flatten().tolist())
+            dt.insert(np.ascontiguousarray(p))
         else:
-            to_move = np.where(_dist(p, pold) > 0)[0]
-            dt.move(to_move.flatten().tolist(), p[to_move].flatten().tolist())
+            to_move = np.flatnonzero(np.any(p != pold, axis=1))
+            dt.move(to_move.astype(np.int64), np.ascontiguousarray(p[to_move]))
 
         # Get the current topology of the triangulation
         p, t = _get_topology(dt)
@@ -219,13 +221,8 @@ def sliver_removal(points, domain, edge_length, comm=None, **kwargs):  # noqa: C
         # Sliver removal
         if count != (max_iter - 1):
             num_move = 0
-            # calculate dihedral angles in mesh
-            dh_angles = geometry.calc_dihedral_angles(p, t)
-            out_of_bounds = np.argwhere(
-                (dh_angles[:, 0] < min_dh_bound) | (dh_angles[:, 0] > max_dh_bound)
-            )
-            ele_nums = np.floor(out_of_bounds / 6).astype("int")
-            ele_nums, ix = np.unique(ele_nums, return_index=True)
+            # find cells with dihedral angles out of bounds
+            ele_nums = geometry.get_slivers(p, t, min_dh_bound, max_dh_bound)
 
             print_msg1(
                 "On rank: "
@@ -255,14 +252,12 @@ def sliver_removal(points, domain, edge_length, comm=None, **kwargs):  # noqa: C
 
             # perturb vector is based on INCREASING circumsphere's radius
             perturb = geometry.calc_circumsphere_grad(p0, p1, p2, p3)
-            perturb[np.isinf(perturb)] = 1.0
-
-            # normalize perturbation vector
-            perturb_norm = np.sum(np.abs(perturb) ** 2, axis=-1) ** (1.0 / 2)
-            perturb /= perturb_norm[:, None]
+            np.nan_to_num(perturb, copy=False, nan=0.0, posinf=1.0, neginf=1.0)
 
-            # perturb % of local mesh size
-            p[move] += push * h0 * perturb
+            # normalize perturbation vector and perturb % of local mesh size
+            perturb_norm = np.linalg.norm(perturb, axis=1)
+            perturb_norm[perturb_norm == 0] = 1.0
+            p[move] += perturb * (push * h0 / perturb_norm)[:, None]
 
         # Bring outside points back to the boundary
         p = _project_points_back_newton(p, fd, deps)
@@ -388,6 +383,9 @@ def generate_mesh(domain, edge_length, comm=None, **kwargs):  # noqa: C901
     # these parameters originate from the original DistMesh
     L0mult = 1 + 0.4 / 2 ** (dim - 1)
     delta_t = opts["delta_t"]
+    ttol = 0.1
+    nwarmup = 10
+    nrescale = 5
     geps = 1e-1 * h0
     deps = np.sqrt(np.finfo(np.double).eps) * h0
 
@@ -402,6 +400,8 @@ def generate_mesh(domain, edge_length, comm=None, **kwargs):  # noqa: C901
     assert N > 0, "No vertices to mesh with!"
 
     count = 0
+    t_old = None
+    pold = None
 
     print_msg1(
         "Commencing mesh generation with %d vertices on rank %d." % (N, comm.rank),
@@ -411,25 +411,34 @@ def generate_mesh(domain, edge_length, comm=None, **kwargs):  # noqa: C901
 
         start = time.time()
 
-        # (Re)-triangulation by the Delaunay algorithm
-        dt = DT()
-        dt.insert(p.flatten().tolist())
+        # Retriangulate only if the points have moved far enough (serial only)
+        if pold is None or count == (max_iter - 1):
+            retriangulate = True
+        else:
+            retriangulate = _dist(p, pold).max() > ttol * h0
 
-        # Get the current topology of the triangulation
-        p, t = _get_topology(dt)
+        if retriangulate:
+            # (Re)-triangulation by the Delaunay algorithm
+            dt = DT()
+            dt.insert(np.ascontiguousarray(p))
 
-        # Find where pfix went
-        ifix = []
-        if nfix > 0:
-            for fix in pfix:
-                ifix.append(_closest_node(fix, p))
+            # Get the current topology of the triangulation
+            p, t = _get_topology(dt)
 
-        # Add ghost points to perform Delaunay in parallel.
-        if comm.size > 1:
-            p, t, inv, recv_ix = _add_ghost_vertices(p, t, dt, extents, comm)
+            if comm.size == 1:
+                pold = p.copy()
 
-        # Remove points outside the domain
-        t = _remove_triangles_outside(p, t, fd, geps)
+            # Find where pfix went
+            ifix = []
+            if nfix > 0:
+                _, ifix = cKDTree(p).query(pfix, k=1)
+
+            # Add ghost points to perform Delaunay in parallel.
+            if comm.size > 1:
+                p, t, inv, recv_ix = _add_ghost_vertices(p, t, dt, extents, comm)
+
+            # Remove points outside the domain
+            t = _remove_triangles_outside(p, t, fd, geps)
 
         # Number of iterations reached, stop.
         if count == (max_iter - 1):
@@ -442,10 +451,18 @@ def generate_mesh(domain, edge_length, comm=None, **kwargs):  # noqa: C901
                 p = _improve_level_set_newton(p, t, fd, deps, deps * 1000)
             break
 
-        # Compute the forces on the edges
-        Ftot = _compute_forces(p, t, fh, h0, L0mult)
+        # Only rebuild the bars when the connectivity changed
+        if t_old is None or (t is not t_old and not np.array_equal(t, t_old)):
+            edges = _get_edges(t)
+            t_old = t
+
+        # The bar lengths converge slowly, so after the first iterations
+        # only periodically rescale the desired bar lengths
+        if count < nwarmup or count % nrescale == 0:
+            scale = 0.0
 
-        Ftot[ifix] = 0  # Force = 0 at fixed points
+        # Compute the forces on the edges (force = 0 at fixed points)
+        Ftot, scale, max_force2 = _compute_forces(p, edges, fh, h0, L0mult, scale, ifix)
 
         # Update positions
         p += delta_t * Ftot
@@ -459,7 +476,7 @@ def generate_mesh(domain, edge_length, comm=None, **kwargs):  # noqa: C901
 
         # Show the user some progress so they know something is happening
         if comm.rank == 0:
-            maxdp = delta_t * np.sqrt((Ftot ** 2).sum(1)).max()
+            maxdp = delta_t * math.sqrt(max_force2)
             print_msg2(
                 "Iteration #%d, max movement is %f, there are %d vertices and %d cells"
                 % (count + 1, maxdp, len(p), len(t)),
@@ -475,15 +492,11 @@ def generate_mesh(domain, edge_length, comm=None, **kwargs):  # noqa: C901
 
 
 def _minmax(bbox0, bbox1):
-    d = []
-    for i, (a, b) in enumerate(zip(bbox0, bbox1)):
-        a, b = (a, b)
-        if i % 2:
-            c = max(a, b)
-        else:
-            c = min(a, b)
-        d.append(c)
-    return tuple(d)
+    """Smallest box that contains both boxes"""
+    a = np.asarray(bbox0, dtype=float).reshape(-1, 2)
+    b = np.asarray(bbox1, dtype=float).reshape(-1, 2)
+    d = np.column_stack((np.minimum(a[:, 0], b[:, 0]), np.maximum(a[:, 1], b[:, 1])))
+    return tuple(d.ravel().tolist())
 
 
 def _check_bbox(bbox):
@@ -591,28 +604,15 @@ def _get_edges(t):
 
 
 # @profile
-def _compute_forces(p, t, fh, h0, L0mult):
-    """Compute the forces on each edge based on the sizing function"""
-    dim = p.shape[1]
-    N = p.shape[0]
-    edges = _get_edges(t)
-    barvec = p[edges[:, 0]] - p[edges[:, 1]]  # List of bar vectors
-    L = np.sqrt((barvec ** 2).sum(1))  # L = Bar lengths
-    L[L == 0] = np.finfo(float).eps
-    hedges = fh(p[edges].sum(1) / 2)
-    L0 = hedges * L0mult * ((L ** dim).sum() / (hedges ** dim).sum()) ** (1.0 / dim)
-    F = L0 - L
-    F[F < 0] = 0  # Bar forces (scalars)
-    Fvec = (
-        F[:, None] / L[:, None].dot(np.ones((1, dim))) * barvec
-    )  # Bar forces (x,y components)
-    Ftot = mutils.dense(
-        edges[:, [0] * dim + [1] * dim],
-        np.repeat([list(range(dim)) * 2], len(F), axis=0),
-        np.hstack((Fvec, -Fvec)),
-        shape=(N, dim),
-    )
-    return Ftot
+def _compute_forces(p, edges, fh, h0, L0mult, scale=0.0, ifix=()):
+    """Compute the forces on each edge based on the sizing function.
+    The desired bar lengths are rescaled unless a positive `scale` is passed.
+    Also returns the scale used and the largest squared nodal force, with the
+    forces at the fixed points `ifix` set to zero.
+    """
+    hedges = fh(0.5 * (p.take(edges[:, 0], axis=0) + p.take(edges[:, 1], axis=0)))
+    ifix = np.asarray(ifix, dtype=np.int32)
+    return gutils.calc_forces(p, edges, hedges, L0mult, scale, ifix)
 
 
 def _add_ghost_vertices(p, t, dt, extents, comm):
@@ -623,7 +623,7 @@ def _add_ghost_vertices(p, t, dt, extents, comm):
     exports = migration.enqueue(extents, p, t, comm.rank, comm.size, dim=dim)
     recv = migration.exchange(comm, comm.rank, comm.size, exports, dim=dim)
     recv_ix = len(recv)
-    dt.insert(recv.flatten().tolist())
+    dt.insert(np.ascontiguousarray(recv))
     p, t = _get_topology(dt)
     p, t, inv = geometry.remove_external_entities(
         p,
@@ -637,7 +637,11 @@ def _add_ghost_vertices(p, t, dt, extents, comm):
 def _remove_triangles_outside(p, t, fd, geps):
     """Remove vertices outside the domain"""
     dim = p.shape[1]
-    pmid = p[t].sum(1) / (dim + 1)  # Compute centroids
+    # Compute centroids without forming the (Nc, dim+1, dim) gather
+    pmid = p.take(t[:, 0], axis=0) + p.take(t[:, 1], axis=0)
+    for i in range(2, dim + 1):
+        pmid += p.take(t[:, i], axis=0)
+    pmid /= dim + 1
     return t[fd(pmid) < -geps]  # Keep interior triangles
 
 
@@ -648,17 +652,18 @@ def _improve_level_set_newton(p, t, fd, deps, tol):
     bid = geometry.get_boundary_vertices(t, dim)
     it = 0
     d = fd(p[bid])
+    dgrads = np.empty((dim, len(bid)))
+    E = deps * np.eye(dim)  # perturbation along each axis
     while max(abs(d)) > tol and it < 10:
-
-        def _deps_vec(i):
-            a = [0] * dim
-            a[i] = deps
-            return a
-
-        dgrads = [(fd(p[bid] + _deps_vec(i)) - d) / deps for i in range(dim)]
-        dgrad2 = sum(dgrad ** 2 for dgrad in dgrads)
-        dgrad2 = np.where(dgrad2 < deps, deps, dgrad2)
-        p[bid] -= (d * np.vstack(dgrads) / dgrad2).T  # Project
+        # evaluate all the perturbed points with a single call to `fd`
+        pb = p[bid]
+        k = len(pb)
+        d_deps = fd(np.vstack([pb + E[i] for i in range(dim)]))
+        np.subtract(d_deps.reshape(dim, k), d, out=dgrads)
+        dgrads /= deps
+        dgrad2 = (dgrads * dgrads).sum(0)
+        np.maximum(dgrad2, deps, out=dgrad2)
+        p[bid] -= (d * dgrads / dgrad2).T  # Project
         it += 1
     return p
 
@@ -672,16 +677,18 @@ def _project_points_back_newton(p, fd, deps):
     d = fd(p)
     ix = d > 0  # Find points outside (d>0)
     if ix.any():
-
-        def _deps_vec(i):
-            a = [0] * dim
-            a[i] = deps
-            return a
-
-        dgrads = [(fd(p[ix] + _deps_vec(i)) - d[ix]) / deps for i in range(dim)]
-        dgrad2 = sum(dgrad ** 2 for dgrad in dgrads)
-        dgrad2 = np.where(dgrad2 < deps, deps, dgrad2)
-        p[ix] -= (d[ix] * np.vstack(dgrads) / dgrad2).T  # Project
+        E = deps * np.eye(dim)  # perturbation along each axis
+
+        # evaluate all the perturbed points with a single call to `fd`
+        pix, dix = p[ix], d[ix]
+        k = len(pix)
+        d_deps = fd(np.vstack([pix + E[i] for i in range(dim)]))
+        dgrads = np.empty((dim, k))
+        np.subtract(d_deps.reshape(dim, k), dix, out=dgrads)
+        dgrads /= deps
+        dgrad2 = (dgrads * dgrads).sum(0)
+        np.maximum(dgrad2, deps, out=dgrad2)
+        p[ix] -= (dix * dgrads / dgrad2).T  # Project
     return p
 
 
@@ -724,11 +731,16 @@ def _generate_initial_points(h0, geps, dim, bbox, fh, fd, pfix, comm, opts):
     # Make sure decimation occurs uniformly accross ranks
     if comm.size > 1:
         r0m = comm.allreduce(r0m, op=MPI.MIN)
+    # Acceptance probability (r0m / r0) ** dim, computed by multiplication
+    ratio = r0m / r0
+    thresh = ratio * ratio
+    if dim == 3:
+        thresh *= ratio
     np.random.seed(opts["seed"])
     p = np.vstack(
         (
             pfix,
-            p[np.random.rand(p.shape[0]) < r0m ** dim / r0 ** dim],
+            p[np.random.rand(p.shape[0]) < thresh],
         )
     )
     extents = _form_extents(p, h0, comm)
@@ -798,10 +810,3 @@ def _get_topology(dt):
     p = dt.get_finite_vertices()
     t = dt.get_finite_cells()
     return p, t
-
-
-def _closest_node(node, nodes):
-    nodes = np.asarray(nodes)
-    deltas = nodes - node
-    dist_2 = np.einsum("ij,ij->i", deltas, deltas)
-    return np.argmin(dist_2)
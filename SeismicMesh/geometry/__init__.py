@@ -4,6 +4,7 @@ from .cpp.fast_geometry import (
     calc_circumsphere_grad,
     calc_dihedral_angles,
     calc_volume_grad,
+    get_slivers,
     unique_edges,
 )
 from .signed_distance_functions import Rectangle, Cube, Disk, drectangle, dblock
@@ -44,6 +45,7 @@ __all__ = [
     "drectangle",
     "dblock",
     "calc_dihedral_angles",
+    "get_slivers",
     "do_any_overlap",
     "linter",
     "laplacian2",
@@ -2,9 +2,12 @@
 #include <pybind11/numpy.h>
 #include <pybind11/stl.h>
 #include <vector>
+#include <cstdint>
 #include <set>
 #include <algorithm>
 #include <tuple>
+#include <cmath>
+#include <limits>
 
 
 #include <iostream>
@@ -29,52 +32,32 @@ private:
     timespec beg_, end_;
 };
 
-template <typename T>
-std::vector<T> vectorSortIntArr(std::vector<std::array<T, 2>> v) {
-  std::sort(v.begin(), v.end());
-  //double t = tmr.elapsed();
-  //tmr.reset();
-  auto iter = std::unique(v.begin(), v.end());
-  //t = tmr.elapsed();
-  //std::cout << t << std::endl;
-
-  size_t len = iter - v.begin();
-  std::vector<T> outvec;
-  outvec.reserve(len * 2);
-  for (auto i = v.begin(); i != iter; ++i) {
-    outvec.push_back(i->at(0));
-    outvec.push_back(i->at(1));
-  }
-  return outvec;
-}
-
+// Sort and remove duplicate edges by packing each (min, max) vertex pair
+// into a single 64-bit key
 py::array unique_edges(
     py::array_t<int, py::array::c_style | py::array::forcecast> edges){
 
-  std::vector<int> cedges(edges.size());
-  std::memcpy(cedges.data(), edges.data(), edges.size() * sizeof(int));
+  const int *cedges = edges.data();
+  const size_t num_edges = edges.size() / 2;
 
-  std::vector<std::array<int, 2>> tl;
-
-  tl.reserve(cedges.size());
-  for(size_t i=0;i<cedges.size();i+=2){
-     tl.push_back({std::min(cedges[i],cedges[i+1]),std::max(cedges[i],cedges[i+1])});
+  std::vector<uint64_t> keys(num_edges);
+  for(size_t i=0;i<num_edges;++i){
+     const uint32_t e0 = cedges[2 * i];
+     const uint32_t e1 = cedges[2 * i + 1];
+     keys[i] = e0 < e1 ? (uint64_t(e0) << 32) | e1 : (uint64_t(e1) << 32) | e0;
   }
 
-  auto u_edges = vectorSortIntArr<int>(std::move(tl));
+  std::sort(keys.begin(), keys.end());
+  keys.erase(std::unique(keys.begin(), keys.end()), keys.end());
 
-  int num_edges = u_edges.size();
-  ssize_t sint = sizeof(int);
-  std::vector<ssize_t> shape = {num_edges/2, 2};
-  std::vector<ssize_t> strides = {sint * 2, sint};
-  return py::array(
-      py::buffer_info(u_edges.data(), /* data as contiguous array  */
-                      sizeof(int),           /* size of one scalar        */
-                      py::format_descriptor<int>::format(), /* data type */
-                      2,      /* number of dimensions      */
-                      shape,  /* shape of the matrix       */
-                      strides /* strides for each axis     */
-                      ));
+  ssize_t num_unique = keys.size();
+  py::array_t<int> u_edges({num_unique, (ssize_t)2});
+  int *out = u_edges.mutable_data();
+  for(ssize_t i=0;i<num_unique;++i){
+     out[2 * i] = int(keys[i] >> 32);
+     out[2 * i + 1] = int(keys[i] & 0xffffffff);
+  }
+  return u_edges;
   }
 
 
@@ -206,6 +189,88 @@ py::array calc_dihedral_angles(
                       ));
 }
 
+// Find the tetrahedrons with at least one dihedral angle outside of the
+// bounds [min_dh_bound, max_dh_bound] (in radians)
+py::array get_slivers(
+    py::array_t<double, py::array::c_style | py::array::forcecast> pts,
+    py::array_t<int, py::array::c_style | py::array::forcecast> cells,
+    double min_dh_bound, double max_dh_bound) {
+  static const std::size_t edges[6][2] = {{2, 3}, {1, 3}, {1, 2},
+                                          {0, 3}, {0, 2}, {0, 1}};
+
+  const double *points = pts.data();
+  const int *c_cells = cells.data();
+  const int num_cells = cells.size() / 4;
+
+  // acos is decreasing so compare the cosines instead of the angles
+  const double cos_min = std::cos(min_dh_bound);
+  const double cos_max = std::cos(max_dh_bound);
+
+  std::vector<int> slivers;
+
+  std::array<double, 3> p0;
+  std::array<double, 3> v1;
+  std::array<double, 3> v2;
+  std::array<double, 3> v3;
+
+  for (int c = 0; c < num_cells; ++c) {
+    for (unsigned int i = 0; i < 6; ++i) {
+      const std::size_t i0 = c_cells[4 * c + edges[i][0]];
+      const std::size_t i1 = c_cells[4 * c + edges[i][1]];
+      const std::size_t i2 = c_cells[4 * c + edges[5 - i][0]];
+      const std::size_t i3 = c_cells[4 * c + edges[5 - i][1]];
+
+      for (unsigned int j = 0; j < 3; ++j) {
+        p0[j] = points[i0 * 3 + j];
+        v1[j] = points[i1 * 3 + j] - p0[j];
+        v2[j] = points[i2 * 3 + j] - p0[j];
+        v3[j] = points[i3 * 3 + j] - p0[j];
+      }
+
+      const double v1_div = l2_norm(v1);
+      const double v2_div = l2_norm(v2);
+      const double v3_div = l2_norm(v3);
+
+      for (unsigned int j = 0; j < 3; ++j) {
+        v1[j] /= v1_div;
+        v2[j] /= v2_div;
+        v3[j] /= v3_div;
+      }
+
+      const double v2Dotv3 = dot_product(v2, v3);
+      const double v1Dotv2 = dot_product(v1, v2);
+      const double v1Dotv3 = dot_product(v1, v3);
+
+      const double norm_v1Crossv2 = l2_norm(cross_product(v1, v2));
+      const double norm_v1Crossv3 = l2_norm(cross_product(v1, v3));
+
+      const double cphi =
+          (v2Dotv3 - v1Dotv2 * v1Dotv3) / ((norm_v1Crossv2 * norm_v1Crossv3));
+
+      // one bad angle is enough
+      if (cphi > cos_min || cphi < cos_max) {
+        slivers.push_back(c);
+        break;
+      }
+    }
+  }
+
+  ssize_t num_slivers = slivers.size();
+  ssize_t soint = sizeof(int);
+  std::vector<ssize_t> shape = {num_slivers};
+  std::vector<ssize_t> strides = {soint};
+
+  // return 1-D NumPy array
+  return py::array(
+      py::buffer_info(slivers.data(), /* data as contiguous array  */
+                      sizeof(int),     /* size of one scalar        */
+                      py::format_descriptor<int>::format(), /* data type */
+                      1,      /* number of dimensions      */
+                      shape,  /* shape of the matrix       */
+                      strides /* strides for each axis     */
+                      ));
+}
+
 // fixed size calculation for 3x3 determinant
 double c_calc_3x3determinant(std::vector<double> &m) {
   // | (0,0) 0  (0,1) 1 (0,2) 2|
@@ -457,11 +522,115 @@ py::array calc_circumsphere_grad(
                       ));
 }
 
+// Compute the bar forces of the DistMesh spring analogy and sum them onto
+// the vertices in a single pass over the edges. The scaling of the desired
+// bar lengths is computed when `scale` is not positive and is returned so it
+// can be reused in the next call, together with the largest squared force.
+// The forces at the `fixed` vertices are zeroed and left out of the maximum.
+py::tuple calc_forces(
+    py::array_t<double, py::array::c_style | py::array::forcecast> points,
+    py::array_t<int, py::array::c_style | py::array::forcecast> edges,
+    py::array_t<double, py::array::c_style | py::array::forcecast> hedges,
+    double L0mult, double scale,
+    py::array_t<int, py::array::c_style | py::array::forcecast> fixed) {
+
+  if (points.ndim() != 2) {
+    throw py::value_error("`points` must be a 2-D array");
+  }
+  if (edges.ndim() != 2 || edges.shape(1) != 2) {
+    throw py::value_error("`edges` must be an (N, 2) array");
+  }
+  if (hedges.size() != edges.shape(0)) {
+    throw py::value_error("`hedges` must have one value per edge");
+  }
+
+  const int dim = points.shape(1);
+  const ssize_t num_points = points.shape(0);
+  const ssize_t num_edges = edges.shape(0);
+
+  const double *p = points.data();
+  const int *e = edges.data();
+  const double *h = hedges.data();
+
+  const bool rescale = scale <= 0.0;
+
+  // bar lengths and the scaling of the desired lengths
+  std::vector<double> L(num_edges);
+  double sum_L = 0.0;
+  double sum_h = 0.0;
+  for (ssize_t i = 0; i < num_edges; ++i) {
+    if (e[2 * i] < 0 || e[2 * i] >= num_points || e[2 * i + 1] < 0 ||
+        e[2 * i + 1] >= num_points) {
+      throw py::index_error("edge references a vertex out of range");
+    }
+    const double *p0 = p + e[2 * i] * dim;
+    const double *p1 = p + e[2 * i + 1] * dim;
+    double sq = 0.0;
+    for (int j = 0; j < dim; ++j) {
+      const double d = p0[j] - p1[j];
+      sq += d * d;
+    }
+    double len = std::sqrt(sq);
+    if (len == 0.0) {
+      len = std::numeric_limits<double>::epsilon();
+    }
+    L[i] = len;
+    if (rescale) {
+      sum_L += std::pow(len, dim);
+      sum_h += std::pow(h[i], dim);
+    }
+  }
+  if (rescale) {
+    scale = L0mult * std::pow(sum_L / sum_h, 1.0 / dim);
+  }
+
+  py::array_t<double> forces({num_points, (ssize_t)dim});
+  double *Ftot = forces.mutable_data();
+  std::fill(Ftot, Ftot + num_points * dim, 0.0);
+
+  // only repulsive forces are kept
+  for (ssize_t i = 0; i < num_edges; ++i) {
+    const double F = h[i] * scale - L[i];
+    if (F <= 0.0) {
+      continue;
+    }
+    const double FoverL = F / L[i];
+    const int i0 = e[2 * i];
+    const int i1 = e[2 * i + 1];
+    for (int j = 0; j < dim; ++j) {
+      const double Fvec = FoverL * (p[i0 * dim + j] - p[i1 * dim + j]);
+      Ftot[i0 * dim + j] += Fvec;
+      Ftot[i1 * dim + j] -= Fvec;
+    }
+  }
+
+  // force = 0 at fixed points
+  const int *f = fixed.data();
+  for (ssize_t i = 0; i < fixed.size(); ++i) {
+    if (f[i] < 0 || f[i] >= num_points) {
+      throw py::index_error("fixed vertex out of range");
+    }
+    std::fill(Ftot + f[i] * dim, Ftot + (f[i] + 1) * dim, 0.0);
+  }
+
+  double max_force2 = 0.0;
+  for (ssize_t i = 0; i < num_points; ++i) {
+    double sq = 0.0;
+    for (int j = 0; j < dim; ++j) {
+      sq += Ftot[i * dim + j] * Ftot[i * dim + j];
+    }
+    max_force2 = std::max(max_force2, sq);
+  }
+  return py::make_tuple(forces, scale, max_force2);
+}
+
 PYBIND11_MODULE(fast_geometry, m) {
   m.def("unique_edges", &unique_edges);
   m.def("calc_volume_grad", &calc_volume_grad);
   m.def("calc_circumsphere_grad", &calc_circumsphere_grad);
   m.def("calc_dihedral_angles", &calc_dihedral_angles);
+  m.def("get_slivers", &get_slivers);
   m.def("calc_4x4determinant", &calc_4x4determinant);
   m.def("calc_3x3determinant", &calc_3x3determinant);
+  m.def("calc_forces", &calc_forces);
 }
@@ -152,14 +152,14 @@ def exchange(comm, rank, size, exports, dim=2):
     NSB = int(exports[0, 0])
     NSA = int(exports[0, 1])
 
-    tmp = []
+    tmp = [np.empty((0, dim))]
     # send points below
     if NSB != 0 and (rank != 0):  # rank 0 can't send below
         comm.send(exports[1 : NSB + 1, 0:dim], dest=rank - 1, tag=11)
 
     # recv  points from above
     if rank != size - 1:
-        tmp = np.append(tmp, comm.recv(source=rank + 1, tag=11))
+        tmp.append(np.reshape(comm.recv(source=rank + 1, tag=11), (-1, dim)))
 
     # send points above
     if NSA != 0 and rank != (size - 1):  # topmost rank can't send to above
@@ -169,8 +169,9 @@ def exchange(comm, rank, size, exports, dim=2):
     # receive points from below
     if rank != 0:
         # all but the bottommost rank receive from below
-        tmp = np.append(tmp, comm.recv(source=rank - 1, tag=11))
+        tmp.append(np.reshape(comm.recv(source=rank - 1, tag=11), (-1, dim)))
 
-    new_points = np.reshape(tmp, (int(len(tmp) / dim), dim))
+    # one contiguous (N, dim) float64 copy of everything received
+    new_points = np.concatenate(tmp).astype(float, copy=False)
 
     return new_points
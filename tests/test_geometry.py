@@ -1,7 +1,9 @@
 import numpy as np
 import pytest
+from scipy.spatial import Delaunay
 
 from SeismicMesh import geometry as geo
+from SeismicMesh.geometry.cpp.fast_geometry import calc_forces
 
 
 @pytest.mark.serial
@@ -56,5 +58,99 @@ def test_geometry():
     assert np.sum(vol) == 8.0
 
 
+@pytest.mark.serial
+def test_get_slivers():
+    rng = np.random.RandomState(0)
+    points = rng.rand(200, 3)
+    cells = Delaunay(points).simplices
+
+    # flatten one cell by pulling its last vertex onto the opposite face
+    flat = len(cells) // 2
+    a, b, c, d = cells[flat]
+    centroid = points[[a, b, c]].mean(0)
+    points[d] = centroid + 1e-3 * (points[d] - centroid)
+
+    min_dh_bound = 10 * np.pi / 180
+    max_dh_bound = 170 * np.pi / 180
+    dh_angles = geo.calc_dihedral_angles(points, cells).reshape(-1, 6)
+    bad = np.any((dh_angles < min_dh_bound) | (dh_angles > max_dh_bound), axis=1)
+
+    slivers = geo.get_slivers(points, cells, min_dh_bound, max_dh_bound)
+    assert np.array_equal(slivers, np.flatnonzero(bad))
+    assert 0 < len(slivers) < len(cells)
+    assert flat in slivers
+
+
+@pytest.mark.serial
+def test_unique_edges():
+    # repeated and reversed pairs collapse to one edge with the smaller vertex first
+    edges = np.array([[3, 1], [1, 3], [0, 2], [2, 0], [1, 3], [2, 1]])
+    assert np.array_equal(geo.unique_edges(edges), [[0, 2], [1, 2], [1, 3]])
+
+
+@pytest.mark.serial
+@pytest.mark.parametrize("dim", [2, 3])
+def test_unique_edges_mesh(dim):
+    rng = np.random.RandomState(0)
+    points = rng.rand(200, dim)
+    cells = Delaunay(points).simplices
+    edges = geo.get_edges(cells, dim=dim)
+
+    # lexicographically sorted, as np.unique orders the rows
+    ref_edges = np.unique(np.sort(edges, axis=1), axis=0)
+    assert np.array_equal(geo.unique_edges(edges), ref_edges)
+
+
+def _numpy_forces(p, edges, hedges, L0mult):
+    """Reference DistMesh bar forces"""
+    dim = p.shape[1]
+    barvec = p[edges[:, 0]] - p[edges[:, 1]]
+    L = np.sqrt((barvec ** 2).sum(1))
+    L[L == 0] = np.finfo(float).eps
+    scale = L0mult * ((L ** dim).sum() / (hedges ** dim).sum()) ** (1.0 / dim)
+    F = hedges * scale - L
+    F[F < 0] = 0
+    Fvec = (F / L)[:, None] * barvec
+    Ftot = np.zeros_like(p)
+    np.add.at(Ftot, edges[:, 0], Fvec)
+    np.add.at(Ftot, edges[:, 1], -Fvec)
+    return Ftot, scale, (Ftot ** 2).sum(1).max()
+
+
+@pytest.mark.serial
+@pytest.mark.parametrize("dim", [2, 3])
+def test_calc_forces(dim):
+    rng = np.random.RandomState(0)
+    points = rng.rand(200, dim)
+    cells = Delaunay(points).simplices
+    edges = geo.get_edges(cells, dim=dim)
+    edges = geo.unique_edges(edges)
+    hedges = 0.1 + 0.1 * points[edges].mean(1)[:, 0]
+    L0mult = 1 + 0.4 / 2 ** (dim - 1)
+
+    Ftot, scale, max_force2 = calc_forces(points, edges, hedges, L0mult, 0.0, [])
+    ref_Ftot, ref_scale, ref_max_force2 = _numpy_forces(points, edges, hedges, L0mult)
+    assert np.allclose(Ftot, ref_Ftot, rtol=0.0, atol=1e-12)
+    assert np.isclose(scale, ref_scale)
+    assert np.isclose(max_force2, ref_max_force2)
+
+    # passing the scale back in skips the rescaling but gives the same forces
+    Ftot2, scale2, _ = calc_forces(points, edges, hedges, L0mult, scale, [])
+    assert scale2 == scale
+    assert np.allclose(Ftot2, Ftot, rtol=0.0, atol=1e-12)
+
+    # fixed points carry no force and are left out of the maximum
+    ifix = np.argsort((ref_Ftot ** 2).sum(1))[-3:]
+    Ftot3, _, max_force2 = calc_forces(points, edges, hedges, L0mult, 0.0, ifix)
+    ref_Ftot[ifix] = 0
+    assert np.allclose(Ftot3, ref_Ftot, rtol=0.0, atol=1e-12)
+    assert np.isclose(max_force2, (ref_Ftot ** 2).sum(1).max())
+
+    with pytest.raises(ValueError):
+        calc_forces(points, edges, hedges[:3], L0mult, 0.0, [])
+    with pytest.raises(ValueError):
+        calc_forces(points, edges, 0.1, L0mult, 0.0, [])
+
+
 if __name__ == "__main__":
     test_geometry()